@@ -14,10 +14,6 @@ echo "安装Tesseract OCR引擎..."
 brew install tesseract
 brew install tesseract-lang  # 安装语言包
 
-# 安装Poppler (pdf2image依赖)
-echo "安装Poppler (用于PDF图像转换)..."
-brew install poppler
-
 # 创建Python虚拟环境
 echo "创建Python虚拟环境..."
 python3 -m venv venv
@@ -21,9 +21,12 @@ python -m pip install --upgrade pip
 pip install -r requirements.txt
 
 echo ==========================================================
-echo 注意：您还需要手动安装Tesseract OCR才能使用文字识别功能
-echo 1. 从 https://github.com/UB-Mannheim/tesseract/wiki 下载并安装Tesseract
-echo 2. 确保将Tesseract添加到系统环境变量PATH中
+echo 注意：tesserocr在PyPI上没有Windows安装包，使用文字识别功能需要手动安装
+echo 1. 从 https://github.com/simonflueckiger/tesserocr-windows_build/releases
+echo    下载与Python版本对应的tesserocr .whl文件，并执行 pip install 文件名.whl
+echo 2. 从 https://github.com/UB-Mannheim/tesseract/wiki 下载并安装Tesseract，
+echo    安装时勾选简体中文(chi_sim)语言包
+echo 3. 将环境变量TESSDATA_PREFIX设置为Tesseract安装目录下的tessdata文件夹
 echo ==========================================================
 
 echo 依赖安装完成！
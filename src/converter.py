@@ -2,17 +2,221 @@
 PDF转Word转换器核心实现
 """
 
+import math
 import os
-import tempfile
-from typing import List, Optional, Dict, Any
-from PyPDF2 import PdfReader
+import re
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+from types import MappingProxyType
+from typing import List, Optional, Any, Mapping, Sequence, Tuple
 from pdf2docx import Converter as PdfToDocxConverter
-import pytesseract
-from PIL import Image
+import fitz
+import numpy as np
 import logging
 from tqdm import tqdm
 
 
+# OCR识别语言
+_OCR_LANG = 'chi_sim+eng'
+
+# 每个OCR任务最多包含的页数，以及工作进程内预先渲染的页数
+_OCR_BATCH_SIZE = 8
+_RENDER_PREFETCH = 4
+
+# 文本中需要转换为Word换行或制表符元素的字符
+_RUN_SPECIAL_CHARS_RE = re.compile(r'([\t\n\r])')
+
+# 默认转换选项
+_DEFAULT_CONVERT_OPTIONS = MappingProxyType({
+    "debug": False,
+    "ocr_dpi": 200
+})
+
+# 各质量级别的转换选项，预先构建为只读映射供所有转换共享
+_CONVERT_OPTIONS = {
+    "low": MappingProxyType({
+        **_DEFAULT_CONVERT_OPTIONS,
+        "multi_processing": False,
+        "first_paragraph": False,
+        "connected_border": False,
+        "ocr_dpi": 150
+    }),
+    "medium": MappingProxyType({
+        **_DEFAULT_CONVERT_OPTIONS,
+        "multi_processing": True,
+        "first_paragraph": True,
+        "connected_border": True
+    }),
+    "high": MappingProxyType({
+        **_DEFAULT_CONVERT_OPTIONS,
+        "multi_processing": True,
+        "first_paragraph": True,
+        "connected_border": True,
+        "line_overlap_threshold": 0.9,
+        "line_break_width_threshold": 1.0,
+        "line_break_free_space_ratio": 0.1,
+        "line_break_mode": True,
+        "ocr_dpi": 300
+    }),
+}
+
+# OCR工作进程中缓存的Tesseract实例和PDF文档，每个进程只初始化一次
+_worker_api = None
+_worker_pdf_doc = None
+_worker_pdf_path = None
+
+
+def _check_tesseract(lang: str) -> None:
+    """检查tesserocr及所需语言包是否可用"""
+    # 限制Tesseract内部线程数，避免与进程池争抢CPU；
+    # OpenMP在加载tesserocr时读取该变量，须在首次导入之前设置，OCR工作进程会继承
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    
+    try:
+        import tesserocr
+    except ImportError:
+        raise ImportError("请安装tesserocr库以使用OCR功能: pip install tesserocr")
+        
+    try:
+        _, languages = tesserocr.get_languages()
+    except Exception:
+        raise ImportError("请安装Tesseract OCR引擎: https://github.com/UB-Mannheim/tesseract/wiki")
+        
+    missing = [name for name in lang.split('+') if name not in languages]
+    if missing:
+        raise ImportError(f"Tesseract缺少语言包: {', '.join(missing)}")
+
+
+def _init_ocr_worker(lang: str) -> None:
+    """OCR工作进程初始化，加载一次语言模型供该进程处理的所有页面复用"""
+    global _worker_api
+    if _worker_api is not None:
+        return
+        
+    from tesserocr import PyTessBaseAPI, PSM
+    _worker_api = PyTessBaseAPI(lang=lang, psm=PSM.AUTO)
+    Finalize(None, _worker_api.End, exitpriority=10)
+    
+    
+def _otsu_threshold(histogram: Sequence[int]) -> int:
+    """根据灰度直方图用Otsu方法计算二值化阈值"""
+    hist = np.asarray(histogram, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * np.arange(hist.size))
+    
+    # 前景或背景为空的阈值会产生0/0，视为类间方差为0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_bg[-1] - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(np.nan_to_num(variance)))
+    
+    
+def _render_page(page_num: int, dpi: int) -> Tuple[bytes, int, int]:
+    """渲染工作进程中已打开PDF的单个页面为二值图像，无需经过临时文件
+    
+    返回 (每像素1字节、取值0或255的像素数据, 宽度, 高度)，可直接交给Tesseract的SetImageBytes，
+    省去PIL图像编码为BMP/PNG后再由Leptonica解码的过程
+    """
+    try:
+        pix = _worker_pdf_doc.load_page(page_num).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        # 直接引用pixmap的像素内存，不做额外拷贝；pix需存活到二值化完成
+        gray = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        gray = gray.reshape(pix.height, pix.stride)[:, :pix.width]
+    except Exception as e:
+        raise ValueError(f"无法将页面 {page_num+1} 转换为图像: {str(e)}")
+        
+    # 二值化后再交给Tesseract，减少其内部预处理的计算量；全部为NumPy向量化运算
+    threshold = _otsu_threshold(np.bincount(gray.ravel(), minlength=256))
+    binary = np.where(gray > threshold, np.uint8(255), np.uint8(0)).tobytes()
+    
+    # 先于pix释放对其像素内存的引用
+    del gray
+    return binary, pix.width, pix.height
+    
+    
+def _ocr_pages(args) -> List[Tuple[int, str]]:
+    """在工作进程中渲染并识别一批连续页面，返回 [(页码, 识别文字), ...]"""
+    global _worker_pdf_doc, _worker_pdf_path
+    pdf_path, page_nums, dpi = args
+    
+    if _worker_pdf_path != pdf_path:
+        _worker_pdf_doc = fitz.open(pdf_path)
+        _worker_pdf_path = pdf_path
+        
+    # 渲染线程预取后续页面，与当前页面的OCR识别重叠执行；
+    # PyMuPDF不是线程安全的，所以只用一个渲染线程
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = deque(
+            executor.submit(_render_page, page_num, dpi)
+            for page_num in page_nums[:_RENDER_PREFETCH]
+        )
+        for i, page_num in enumerate(page_nums):
+            data, width, height = pending.popleft().result()
+            if i + _RENDER_PREFETCH < len(page_nums):
+                pending.append(executor.submit(_render_page, page_nums[i + _RENDER_PREFETCH], dpi))
+                
+            # 识别文字
+            _worker_api.SetImageBytes(data, width, height, 1, width)
+            results.append((page_num, _worker_api.GetUTF8Text()))
+            
+    return results
+
+
+def _split_ocr_batches(page_nums: Sequence[int], processes: int) -> Tuple[List[List[int]], int]:
+    """将页码按顺序均分为OCR任务，返回 (各任务的页码列表, 进程池大小)
+    
+    任务数不少于进程数，使每个进程都有任务可做，每个任务最多包含_OCR_BATCH_SIZE页；
+    进程池大小不超过processes，也不超过任务数
+    """
+    count = min(len(page_nums), max(processes, math.ceil(len(page_nums) / _OCR_BATCH_SIZE)))
+    if count == 0:
+        return [], 0
+        
+    # 前remainder个任务各多分一页
+    size, remainder = divmod(len(page_nums), count)
+    batches = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < remainder else 0)
+        batches.append(list(page_nums[start:end]))
+        start = end
+    return batches, min(processes, count)
+
+
+def _close_worker_pdf() -> None:
+    """关闭当前进程中缓存的PDF文档"""
+    global _worker_pdf_doc, _worker_pdf_path
+    if _worker_pdf_doc is not None:
+        _worker_pdf_doc.close()
+    _worker_pdf_doc = _worker_pdf_path = None
+
+
+def _append_text_paragraph(body, text: str) -> None:
+    """在文档body末尾追加一个文本段落，换行和制表符转换为对应的Word元素
+    
+    python-docx的run.text会逐字符处理文本，这里按换行和制表符整段切分，
+    对OCR输出这类多行长文本明显更快
+    """
+    p = body.add_p()
+    if not text:
+        return
+        
+    r = p.add_r()
+    for piece in _RUN_SPECIAL_CHARS_RE.split(text):
+        if piece == '\t':
+            r.add_tab()
+        elif piece in ('\n', '\r'):
+            r.add_br()
+        elif piece:
+            r.add_t(piece)
+
+
 class PDFConverter:
     """PDF转Word转换器类，提供PDF文件到Word文档的转换功能"""
     
@@ -20,9 +224,18 @@ class PDFConverter:
         """初始化转换器"""
         self.logger = self._setup_logger()
         
+        # Tesseract可用性的检查结果，首次使用OCR时检查并缓存
+        self._tesseract_ok: Optional[bool] = None
+        self._tesseract_error = ""
+        
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
         logger = logging.getLogger("pdf_converter")
+        
+        # 同名日志记录器是全局共享的，已配置过则直接复用，避免重复添加处理器
+        if logger.handlers:
+            return logger
+            
         logger.setLevel(logging.INFO)
         
         # 创建控制台处理器
@@ -40,7 +253,8 @@ class PDFConverter:
         
     def convert_pdf_to_word(self, pdf_path: str, output_path: str, 
                            quality: str = "medium", use_ocr: bool = False,
-                           pages: Optional[List[int]] = None) -> None:
+                           pages: Optional[List[int]] = None,
+                           processes: Optional[int] = None) -> None:
         """
         将PDF文件转换为Word文档
         
@@ -50,28 +264,28 @@ class PDFConverter:
             quality: 转换质量，可选值为 "low", "medium", "high"
             use_ocr: 是否使用OCR识别文字
             pages: 要转换的页码列表，如果为None则转换所有页面
+            processes: 本次转换最多使用的进程数，如果为None则使用所有CPU核心；
+                多个文件并行转换时用于分配各文件的进程数
         """
         self.logger.info(f"开始转换: {pdf_path} -> {output_path}")
-        self.logger.info(f"转换质量: {quality}, 使用OCR: {use_ocr}, 页码: {pages}")
+        self.logger.info("转换质量: %s, 使用OCR: %s, 页码: %s", quality, use_ocr, pages)
         
         try:
             # 检查PDF文件是否存在
             if not os.path.exists(pdf_path):
                 raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
                 
-            # 检查PDF文件是否可读
-            try:
-                pdf_reader = PdfReader(pdf_path)
-                total_pages = len(pdf_reader.pages)
-                self.logger.info(f"PDF总页数: {total_pages}")
-            except Exception as e:
-                raise ValueError(f"无法读取PDF文件: {str(e)}")
+            # 检查文件头，PDF标识须出现在文件开头的1024字节内；
+            # 总页数由之后实际打开文档的pdf2docx/PyMuPDF获取，不再额外解析整个文件
+            with open(pdf_path, 'rb') as f:
+                if b'%PDF-' not in f.read(1024):
+                    raise ValueError("无法读取PDF文件: 文件头不是有效的PDF格式")
             
             # 根据用户选择执行转换
             if use_ocr:
-                self._convert_with_ocr(pdf_path, output_path, quality, pages)
+                self._convert_with_ocr(pdf_path, output_path, quality, pages, processes)
             else:
-                self._convert_without_ocr(pdf_path, output_path, quality, pages)
+                self._convert_without_ocr(pdf_path, output_path, quality, pages, processes)
                 
             self.logger.info(f"转换完成: {output_path}")
         except Exception as e:
@@ -79,53 +293,85 @@ class PDFConverter:
             raise
             
     def _convert_without_ocr(self, pdf_path: str, output_path: str, 
-                            quality: str, pages: Optional[List[int]]) -> None:
+                            quality: str, pages: Optional[List[int]],
+                            processes: Optional[int] = None) -> None:
         """使用pdf2docx直接转换PDF到Word"""
         # 设置转换选项
         convert_options = self._get_convert_options(quality)
         
-        # 确定页码范围
-        pdf_reader = PdfReader(pdf_path)
-        total_pages = len(pdf_reader.pages)
+        # pdf2docx的多进程模式总是按CPU核心数创建进程池，并在当前目录下写入固定名称的
+        # 中间文件，因此进程数受限(即多个文件并行转换)时改为单进程转换
+        if processes is not None and processes < (os.cpu_count() or 1):
+            convert_options = {**convert_options, "multi_processing": False}
         
-        # 如果指定了页码，则只转换指定页码
-        if pages:
-            # 过滤掉超出范围的页码
-            valid_pages = [p - 1 for p in pages if 0 < p <= total_pages]  # 转为0索引
-            page_ranges = []
-            
-            for page in valid_pages:
-                page_ranges.append((page, page + 1))
-        else:
-            # 转换所有页码
-            page_ranges = [(0, total_pages)]
-            
-        # 开始转换
+        # 创建转换器实例，总页数直接取自pdf2docx打开的文档
         try:
-            # 创建转换器实例
             cv = PdfToDocxConverter(pdf_path)
+        except Exception as e:
+            raise ValueError(f"无法读取PDF文件: {str(e)}")
             
-            # 对每个页面范围进行转换
-            for start, end in page_ranges:
-                self.logger.info(f"转换页面范围: {start+1} - {end}")
-                cv.convert(output_path, start=start, end=end, **convert_options)
-                
+        # 同一个转换器实例贯穿整个转换过程(包括替代方法)，结束时统一关闭
+        try:
+            total_pages = cv.fitz_doc.page_count
+            self.logger.info("PDF总页数: %d", total_pages)
+            
+            # 默认转换所有页码
+            start, end, pages_0 = 0, total_pages, None
+            page_options = convert_options
+            
+            # 如果指定了页码，则只转换指定页码
+            if pages:
+                # 过滤掉超出范围的页码
+                pages_0 = sorted({p - 1 for p in pages if 0 < p <= total_pages})  # 转为0索引并去重
+                if not pages_0:
+                    raise ValueError(f"指定的页码超出PDF页数范围(共{total_pages}页)")
+                    
+                if pages_0[-1] - pages_0[0] + 1 == len(pages_0):
+                    # 连续页面改用start/end指定，以保留pdf2docx的多进程转换
+                    start, end, pages_0 = pages_0[0], pages_0[-1] + 1, None
+                else:
+                    # pdf2docx的多进程模式只支持由start/end指定的连续页面
+                    page_options = {**convert_options, "multi_processing": False}
+                    
+            # 开始转换
+            try:
+                # 所有页面一次转换完成，由pdf2docx统一完成版面分析
+                if pages_0:
+                    if self.logger.isEnabledFor(logging.INFO):
+                        self.logger.info("转换页码: %s", [p + 1 for p in pages_0])
+                else:
+                    self.logger.info("转换页面范围: %d - %d", start + 1, end)
+                cv.convert(output_path, start=start, end=end, pages=pages_0, **page_options)
+            except Exception as e:
+                self.logger.error(f"PDF转换异常: {str(e)}")
+                # 尝试使用另一种方法
+                try:
+                    self.logger.info("尝试使用替代方法转换...")
+                    # 使用更简单的方法进行转换，复用已打开的文档
+                    cv.convert(output_path, **convert_options)
+                except Exception as second_e:
+                    self.logger.error(f"替代转换方法也失败: {str(second_e)}")
+                    raise ValueError(f"PDF转换失败，可能是文件格式不支持或者已被加密: {str(second_e)}")
+        finally:
             # 关闭转换器
             cv.close()
-        except Exception as e:
-            self.logger.error(f"PDF转换异常: {str(e)}")
-            # 尝试使用另一种方法
-            try:
-                self.logger.info("尝试使用替代方法转换...")
-                # 使用更简单的方法进行转换，直接指定页面范围
-                PdfToDocxConverter(pdf_path).convert(output_path, **convert_options)
-            except Exception as second_e:
-                self.logger.error(f"替代转换方法也失败: {str(second_e)}")
-                raise ValueError(f"PDF转换失败，可能是文件格式不支持或者已被加密: {str(second_e)}")
                 
     def _convert_with_ocr(self, pdf_path: str, output_path: str,
-                         quality: str, pages: Optional[List[int]]) -> None:
+                         quality: str, pages: Optional[List[int]],
+                         processes: Optional[int] = None) -> None:
         """使用OCR技术将PDF转换为Word"""
+        # 检查Tesseract是否可用，不可用时在做任何工作之前报错
+        if self._tesseract_ok is None:
+            try:
+                _check_tesseract(_OCR_LANG)
+                self._tesseract_ok = True
+            except ImportError as e:
+                self._tesseract_ok = False
+                self._tesseract_error = str(e)
+        if not self._tesseract_ok:
+            self.logger.error(f"Tesseract OCR引擎未安装或不可用: {self._tesseract_error}")
+            raise ImportError(self._tesseract_error)
+            
         from docx import Document
         from docx.shared import Pt
         
@@ -137,102 +383,64 @@ class PDFConverter:
         style.font.name = '宋体'
         style.font.size = Pt(12)
         
-        # 打开PDF文件
-        pdf_reader = PdfReader(pdf_path)
-        total_pages = len(pdf_reader.pages)
+        # 获取PDF总页数
+        try:
+            with fitz.open(pdf_path) as pdf_doc:
+                total_pages = pdf_doc.page_count
+        except Exception as e:
+            raise ValueError(f"无法读取PDF文件: {str(e)}")
+        self.logger.info("PDF总页数: %d", total_pages)
         
         # 确定要处理的页码
         if pages:
             # 过滤掉超出范围的页码
-            process_pages = [p - 1 for p in pages if 0 < p <= total_pages]  # 转为0索引
+            process_pages = sorted({p - 1 for p in pages if 0 < p <= total_pages})  # 转为0索引并去重
+            if not process_pages:
+                raise ValueError(f"指定的页码超出PDF页数范围(共{total_pages}页)")
         else:
             # 处理所有页码
             process_pages = list(range(total_pages))
             
-        # 处理每个页面
-        for i, page_num in enumerate(process_pages):
-            # 打印进度
-            self.logger.info(f"正在处理页面 {page_num + 1}/{total_pages}")
-            
-            # 提取页面
-            page = pdf_reader.pages[page_num]
+        if not process_pages:
+            doc.save(output_path)
+            return
             
-            # 将页面转换为图像
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_image_path = temp_file.name
-                
-            # 这里需要使用pdf2image库将PDF页面转换为图像
-            try:
-                from pdf2image import convert_from_path
-                images = convert_from_path(pdf_path, first_page=page_num+1, last_page=page_num+1)
-                if not images:
-                    raise ValueError(f"无法将页面 {page_num+1} 转换为图像")
-                images[0].save(temp_image_path, 'PNG')
-            except ImportError:
-                self.logger.error("未安装pdf2image库，无法使用OCR功能")
-                raise ImportError("请安装pdf2image库以使用OCR功能: pip install pdf2image")
-            except Exception as e:
-                self.logger.error(f"PDF转图像失败: {str(e)}")
-                raise ValueError(f"无法将PDF转换为图像，可能需要安装poppler依赖: {str(e)}")
-                
-            # 使用OCR识别文字
-            try:
-                img = Image.open(temp_image_path)
-                
-                # 检查Tesseract是否可用
-                try:
-                    pytesseract.get_tesseract_version()
-                except Exception:
-                    self.logger.error("Tesseract OCR引擎未安装或不可用")
-                    raise ImportError("请安装Tesseract OCR引擎: https://github.com/UB-Mannheim/tesseract/wiki")
-                
-                # 识别文字
-                text = pytesseract.image_to_string(img, lang='chi_sim+eng')
-                
-                # 将识别的文字添加到Word文档
-                if i > 0:
-                    doc.add_page_break()
-                doc.add_paragraph(text)
-            except Exception as e:
-                self.logger.error(f"OCR识别失败: {str(e)}")
-                raise
-            finally:
-                # 删除临时文件
-                if os.path.exists(temp_image_path):
-                    os.remove(temp_image_path)
+        # 按批次多进程并行识别，imap保证结果按页码顺序返回
+        dpi = self._get_convert_options(quality)["ocr_dpi"]
+        page_batches, processes = _split_ocr_batches(process_pages, processes or os.cpu_count() or 1)
+        ocr_args = [(pdf_path, batch, dpi) for batch in page_batches]
+        # 直接在底层XML元素上追加段落，生成的XML与add_page_break/add_paragraph相同
+        body = doc.element.body
+        try:
+            with ExitStack() as stack:
+                if processes > 1:
+                    pool = stack.enter_context(Pool(processes=processes, initializer=_init_ocr_worker,
+                                                    initargs=(_OCR_LANG,)))
+                    batches = pool.imap(_ocr_pages, ocr_args)
+                else:
+                    # 只有一个进程可用时直接在当前进程中识别，不再创建子进程
+                    _init_ocr_worker(_OCR_LANG)
+                    stack.callback(_close_worker_pdf)
+                    batches = map(_ocr_pages, ocr_args)
                     
+                i = 0
+                for batch in batches:
+                    for page_num, text in batch:
+                        # 打印进度
+                        self.logger.info("正在处理页面 %d/%d", page_num + 1, total_pages)
+                        
+                        # 将识别的文字添加到Word文档
+                        if i > 0:
+                            body.add_p().add_r().add_br().type = 'page'
+                        _append_text_paragraph(body, text)
+                        i += 1
+        except Exception as e:
+            self.logger.error(f"OCR识别失败: {str(e)}")
+            raise
+            
         # 保存Word文档
         doc.save(output_path)
         
-    def _get_convert_options(self, quality: str) -> Dict[str, Any]:
-        """根据质量设置，返回转换选项"""
-        # 默认选项
-        options = {
-            "debug": False
-        }
-        
-        # 根据质量级别设置选项
-        if quality == "low":
-            options.update({
-                "multi_processing": False,
-                "first_paragraph": False,
-                "connected_border": False
-            })
-        elif quality == "medium":
-            options.update({
-                "multi_processing": True,
-                "first_paragraph": True,
-                "connected_border": True
-            })
-        elif quality == "high":
-            options.update({
-                "multi_processing": True,
-                "first_paragraph": True,
-                "connected_border": True,
-                "line_overlap_threshold": 0.9,
-                "line_break_width_threshold": 1.0,
-                "line_break_free_space_ratio": 0.1,
-                "line_break_mode": True
-            })
-            
-        return options 
\ No newline at end of file
+    def _get_convert_options(self, quality: str) -> Mapping[str, Any]:
+        """根据质量设置，返回只读的转换选项"""
+        return _CONVERT_OPTIONS.get(quality, _DEFAULT_CONVERT_OPTIONS) 
\ No newline at end of file
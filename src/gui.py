@@ -2,94 +2,203 @@
 PDF转Word软件的GUI界面
 """
 
+import multiprocessing as mp
 import os
+import re
+import signal
+import subprocess
 import sys
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import PurePath
 from typing import List, Optional, Tuple, Dict
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QFileDialog, 
                              QLabel, QProgressBar, QVBoxLayout, QHBoxLayout, 
                              QWidget, QComboBox, QSpinBox, QCheckBox, QMessageBox,
                              QListWidget, QGroupBox, QTabWidget, QSlider)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize
+from PyQt6.QtCore import Qt, QThread, QElapsedTimer, pyqtSignal, QSize
 from PyQt6.QtGui import QIcon, QFont, QDragEnterEvent, QDropEvent
 
 from .converter import PDFConverter
 
 
+# 页码范围中以逗号分隔的单个页码或范围，例如 "8" 或 "1-5"
+_PAGE_RANGE_RE = re.compile(r'\s*(\d+)\s*(?:-\s*(\d+))?\s*')
+
+
+# 进度信号的最小发送间隔(毫秒)，即最多每秒20次
+_PROGRESS_INTERVAL_MS = 50
+
+# 批量转换工作进程中复用的转换器
+_worker_converter: Optional[PDFConverter] = None
+
+
+def _init_convert_worker() -> None:
+    """批量转换工作进程初始化，被终止时一并终止其创建的子进程(如OCR进程池)
+    
+    Windows上终止进程不会发出信号，其子进程由WorkerThread._terminate_workers终止
+    """
+    global _worker_converter
+    _worker_converter = PDFConverter()
+    
+    def _terminate(signum, frame):
+        for child in mp.active_children():
+            child.terminate()
+        os._exit(1)
+        
+    signal.signal(signal.SIGTERM, _terminate)
+    
+    
+def _convert_one(pdf_file: str, output_file: str, quality: str, use_ocr: bool,
+                 pages: Optional[List[int]], processes: int) -> None:
+    """在工作进程中转换单个PDF文件"""
+    # 检查文件是否存在
+    if not os.path.exists(pdf_file):
+        raise FileNotFoundError(f"文件不存在: {pdf_file}")
+        
+    # 检查文件是否是PDF
+    if not pdf_file.lower().endswith('.pdf'):
+        raise ValueError(f"文件不是PDF格式: {pdf_file}")
+        
+    # 转换PDF到Word
+    _worker_converter.convert_pdf_to_word(
+        pdf_file, 
+        output_file, 
+        quality=quality,
+        use_ocr=use_ocr,
+        pages=pages,
+        processes=processes
+    )
+
+
+def _output_files(pdf_files: List[str], output_dir: str) -> List[str]:
+    """确定每个PDF文件的输出Word文档路径
+    
+    不同目录下的同名文件会被同时转换，为避免写入同一个文档，重名的依次加上序号，如 "报告_2.docx"
+    """
+    used = set()
+    output_files = []
+    for pdf_file in pdf_files:
+        stem = PurePath(pdf_file).stem
+        name, index = stem, 1
+        while os.path.normcase(name) in used:
+            index += 1
+            name = f"{stem}_{index}"
+        used.add(os.path.normcase(name))
+        output_files.append(os.path.join(output_dir, name + ".docx"))
+    return output_files
+
+
 class WorkerThread(QThread):
-    """工作线程，用于后台处理PDF转换任务"""
+    """工作线程，将PDF转换任务分发到进程池，并将其进度转发为Qt信号"""
     progress_signal = pyqtSignal(int, str)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, converter: PDFConverter, files: List[str], output_dir: str, 
+    def __init__(self, files: List[str], output_dir: str, 
                  quality: str, use_ocr: bool, pages: Optional[List[int]] = None):
         super().__init__()
-        self.converter = converter
         self.files = files
         self.output_dir = output_dir
         self.quality = quality
         self.use_ocr = use_ocr
         self.pages = pages
+        self._cancelled = False
+        self._progress_timer = QElapsedTimer()
+        self._progress_timer.start()
+        self._pending_progress: Optional[Tuple[int, str]] = None
+        
+    def _emit_progress(self, value: int, status: str, force: bool = False):
+        """发出进度信号，限制发送频率，避免跨线程信号过多占用GUI事件循环
+        
+        未满发送间隔的进度只保留最新的一个，由_flush_progress在间隔满后发出
+        """
+        self._pending_progress = (value, status)
+        self._flush_progress(force)
         
+    def _flush_progress(self, force: bool = False):
+        """发出保留的最新进度，距上次发送未满最小间隔时继续保留(force为True时除外)"""
+        if self._pending_progress is None:
+            return
+        if force or self._progress_timer.elapsed() >= _PROGRESS_INTERVAL_MS:
+            self.progress_signal.emit(*self._pending_progress)
+            self._pending_progress = None
+            self._progress_timer.restart()
+            
+    def _pending_progress_delay(self) -> Optional[float]:
+        """距可以发出保留进度的剩余秒数，没有保留的进度时返回None"""
+        if self._pending_progress is None:
+            return None
+        return max(0, _PROGRESS_INTERVAL_MS - self._progress_timer.elapsed()) / 1000
+            
     def run(self):
         try:
             successful_files = []
             failed_files = []
+            total_files = len(self.files)
             
-            for i, pdf_file in enumerate(self.files):
-                file_name = os.path.basename(pdf_file)
-                progress = int((i / len(self.files)) * 100)
-                self.progress_signal.emit(progress, f"正在转换: {file_name}")
-                
-                output_file = os.path.join(
-                    self.output_dir, 
-                    os.path.splitext(file_name)[0] + ".docx"
-                )
-                
-                try:
-                    # 检查文件是否存在
-                    if not os.path.exists(pdf_file):
-                        raise FileNotFoundError(f"文件不存在: {pdf_file}")
-                    
-                    # 检查文件是否是PDF
-                    if not pdf_file.lower().endswith('.pdf'):
-                        raise ValueError(f"文件不是PDF格式: {pdf_file}")
+            self._emit_progress(0, f"正在转换 {total_files} 个文件...", force=True)
+            
+            # pdf2docx和OCR在单个文件内部已会使用多个核心，因此只用一半核心并行处理文件，
+            # 并为每个文件分配可用的进程数，避免各文件内部的进程池叠加后超出CPU核心数
+            cpu_count = os.cpu_count() or 2
+            max_workers = max(1, min(total_files, cpu_count // 2))
+            processes = max(1, cpu_count // max_workers)
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     initializer=_init_convert_worker) as executor:
+                futures = {}
+                for pdf_file, output_file in zip(self.files, _output_files(self.files, self.output_dir)):
+                    future = executor.submit(_convert_one, pdf_file, output_file,
+                                             self.quality, self.use_ocr, self.pages,
+                                             processes)
+                    futures[future] = PurePath(pdf_file).name
                     
-                    # 转换PDF到Word
-                    self.converter.convert_pdf_to_word(
-                        pdf_file, 
-                        output_file, 
-                        quality=self.quality,
-                        use_ocr=self.use_ocr,
-                        pages=self.pages
-                    )
+                not_done = set(futures)
+                done = 0
+                while not_done:
+                    # 有被跳过的进度时，最多等到可以发出它为止
+                    completed, not_done = wait(not_done, timeout=self._pending_progress_delay(),
+                                               return_when=FIRST_COMPLETED)
+                    if self._cancelled:
+                        self._terminate_workers()
+                        return
+                    self._flush_progress()
                     
-                    successful_files.append(file_name)
-                except FileNotFoundError as e:
-                    failed_files.append(f"{file_name}: 文件不存在")
-                except ImportError as e:
-                    # 依赖问题
-                    failed_files.append(f"{file_name}: {str(e)}")
-                    self.finished_signal.emit(False, f"缺少必要的依赖项: {str(e)}")
-                    return
-                except ValueError as e:
-                    # 格式或参数问题
-                    failed_files.append(f"{file_name}: {str(e)}")
-                except Exception as e:
-                    # 其他错误
-                    error_msg = f"{file_name}: 未知错误 - {str(e)}"
-                    failed_files.append(error_msg)
-            
+                    for future in completed:
+                        done += 1
+                        file_name = futures[future]
+                        try:
+                            future.result()
+                            successful_files.append(file_name)
+                        except FileNotFoundError as e:
+                            failed_files.append(f"{file_name}: 文件不存在")
+                        except ImportError as e:
+                            # 依赖问题，终止其余的转换，否则退出进程池时会等待它们全部完成；
+                            # 进程池随之失效，尚未开始的任务不再执行
+                            self._terminate_workers()
+                            failed_files.append(f"{file_name}: {str(e)}")
+                            self.finished_signal.emit(False, f"缺少必要的依赖项: {str(e)}")
+                            return
+                        except ValueError as e:
+                            # 格式或参数问题
+                            failed_files.append(f"{file_name}: {str(e)}")
+                        except Exception as e:
+                            # 其他错误
+                            error_msg = f"{file_name}: 未知错误 - {str(e)}"
+                            failed_files.append(error_msg)
+                            
+                        progress = int((done / total_files) * 100)
+                        self._emit_progress(progress, f"已完成: {file_name} ({done}/{total_files})")
+                
             # 更新进度为100%
-            self.progress_signal.emit(100, "转换完成！")
+            self._emit_progress(100, "转换完成！", force=True)
             
             # 构建完成消息
-            if len(successful_files) == len(self.files):
+            if len(successful_files) == total_files:
                 # 全部成功
                 self.finished_signal.emit(True, f"所有 {len(successful_files)} 个PDF文件已成功转换！")
             elif len(successful_files) > 0:
                 # 部分成功
-                success_msg = f"成功转换 {len(successful_files)}/{len(self.files)} 个文件。\n\n"
+                success_msg = f"成功转换 {len(successful_files)}/{total_files} 个文件。\n\n"
                 fail_msg = "转换失败的文件:\n" + "\n".join(failed_files)
                 self.finished_signal.emit(False, success_msg + fail_msg)
             else:
@@ -98,9 +207,27 @@ class WorkerThread(QThread):
                 self.finished_signal.emit(False, fail_msg)
                 
         except Exception as e:
+            if self._cancelled:
+                return
             # 捕获所有异常
             error_details = traceback.format_exc()
             self.finished_signal.emit(False, f"转换过程中出现意外错误: {str(e)}\n\n详细信息: {error_details}")
+            
+    def cancel(self):
+        """取消转换，终止所有转换进程"""
+        self._cancelled = True
+        self._terminate_workers()
+        
+    @staticmethod
+    def _terminate_workers():
+        """终止进程池中的工作进程，进程池随之失效，未完成的任务不再执行"""
+        for child in mp.active_children():
+            if sys.platform == 'win32':
+                # Windows上terminate()直接结束进程而不触发SIGTERM处理函数，改用taskkill连同其子进程一并终止
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(child.pid)],
+                               capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            else:
+                child.terminate()
 
 
 class MainWindow(QMainWindow):
@@ -110,7 +237,6 @@ class MainWindow(QMainWindow):
         
         self.pdf_files: List[str] = []
         self.output_directory: str = os.path.expanduser("~/Documents")
-        self.converter = PDFConverter()
         
         self.init_ui()
         
@@ -324,28 +450,29 @@ class MainWindow(QMainWindow):
             self.output_label.setText(f"输出目录: {self.output_directory}")
             
     def parse_page_range(self, page_range_str: str) -> List[int]:
-        """解析页码范围字符串，返回页码列表"""
-        pages = []
-        if not page_range_str:
-            return pages
+        """解析页码范围字符串，返回页码列表，格式无效时返回空列表"""
+        ranges = []
+        for part in page_range_str.split(','):
+            # 允许多余的逗号，其余每一项都必须是页码或页码范围
+            if not part.strip():
+                continue
+            match = _PAGE_RANGE_RE.fullmatch(part)
+            if match is None:
+                return []
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else start
+            ranges.append((start, end))
             
-        parts = page_range_str.split(',')
-        for part in parts:
-            if '-' in part:
-                start, end = part.split('-')
-                try:
-                    start_int = int(start.strip())
-                    end_int = int(end.strip())
-                    pages.extend(range(start_int, end_int + 1))
-                except ValueError:
-                    continue
-            else:
-                try:
-                    pages.append(int(part.strip()))
-                except ValueError:
-                    continue
-                    
-        return sorted(list(set(pages)))
+        # 只对范围排序并跳过重叠部分，逐页的展开交给range在C层完成，
+        # 无需再对所有页码做集合去重和排序
+        pages = []
+        last = -1
+        for start, end in sorted(ranges):
+            if end > last:
+                pages.extend(range(max(start, last + 1), end + 1))
+                last = end
+                
+        return pages
         
     def start_conversion(self):
         """开始转换流程"""
@@ -376,7 +503,7 @@ class MainWindow(QMainWindow):
         
         # 创建并启动工作线程
         self.worker_thread = WorkerThread(
-            self.converter, self.pdf_files, self.output_directory, 
+            self.pdf_files, self.output_directory, 
             quality, use_ocr, pages
         )
         
@@ -393,7 +520,7 @@ class MainWindow(QMainWindow):
     def cancel_conversion(self):
         """取消转换过程"""
         if self.worker_thread and self.worker_thread.isRunning():
-            self.worker_thread.terminate()
+            self.worker_thread.cancel()
             self.worker_thread.wait()
             
             self.status_label.setText("转换已取消")
@@ -3,14 +3,17 @@
 """
 
 import os
+import random
 import sys
 import unittest
 from pathlib import Path
+from unittest import mock
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.converter import PDFConverter
+from src.converter import (PDFConverter, _OCR_BATCH_SIZE, _append_text_paragraph,
+                           _otsu_threshold, _split_ocr_batches)
 
 
 class TestPDFConverter(unittest.TestCase):
@@ -32,6 +35,13 @@ class TestPDFConverter(unittest.TestCase):
         self.assertIsNotNone(self.converter)
         self.assertIsNotNone(self.converter.logger)
         
+    def test_logger_handlers_not_duplicated(self):
+        """测试多次创建转换器不会重复添加日志处理器"""
+        handler_count = len(self.converter.logger.handlers)
+        other = PDFConverter()
+        self.assertIs(other.logger, self.converter.logger)
+        self.assertEqual(len(other.logger.handlers), handler_count)
+        
     def test_get_convert_options(self):
         """测试获取转换选项"""
         low_options = self.converter._get_convert_options("low")
@@ -43,6 +53,124 @@ class TestPDFConverter(unittest.TestCase):
         high_options = self.converter._get_convert_options("high")
         self.assertTrue(high_options["multi_processing"])
         self.assertTrue("line_break_mode" in high_options)
+        
+        self.assertLess(low_options["ocr_dpi"], medium_options["ocr_dpi"])
+        self.assertLess(medium_options["ocr_dpi"], high_options["ocr_dpi"])
+        
+    def test_convert_options_read_only(self):
+        """测试转换选项为共享的只读映射"""
+        options = self.converter._get_convert_options("medium")
+        self.assertIs(options, self.converter._get_convert_options("medium"))
+        with self.assertRaises(TypeError):
+            options["debug"] = True
+            
+        default_options = self.converter._get_convert_options("unknown")
+        self.assertFalse(default_options["debug"])
+        self.assertNotIn("multi_processing", default_options)
+        
+    def test_otsu_threshold(self):
+        """测试Otsu二值化阈值计算与逐个阈值穷举的结果一致"""
+        def reference(histogram):
+            best_threshold, best_variance = 0, 0.0
+            for t in range(256):
+                weight_bg = sum(histogram[:t + 1])
+                weight_fg = sum(histogram[t + 1:])
+                if weight_bg == 0 or weight_fg == 0:
+                    continue
+                mean_bg = sum(i * histogram[i] for i in range(t + 1)) / weight_bg
+                mean_fg = sum(i * histogram[i] for i in range(t + 1, 256)) / weight_fg
+                variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+                if variance > best_variance:
+                    best_threshold, best_variance = t, variance
+            return best_threshold
+            
+        def make(bins):
+            histogram = [0] * 256
+            for level, count in bins.items():
+                histogram[level] = count
+            return histogram
+            
+        rng = random.Random(0)
+        histograms = [
+            [0] * 256,                                  # 空白直方图
+            make({128: 1000}),                          # 只有一个灰度级，两类之一总为空
+            make({0: 700, 255: 300}),                   # 两端的纯黑白图像
+            make({30: 500, 220: 1500}),                 # 中间的阈值都是并列最大值
+            make({50: 10, 100: 10, 150: 10, 200: 10}),  # 对称分布，存在多组并列值
+            [1] * 256,                                  # 均匀分布
+            [rng.randint(0, 50) for _ in range(256)],
+            [rng.choice([0, 0, 0, rng.randint(1, 5000)]) for _ in range(256)],
+        ]
+        for i, histogram in enumerate(histograms):
+            with self.subTest(case=i):
+                self.assertEqual(_otsu_threshold(histogram), reference(histogram))
+                
+        # 并列最大值取最小的阈值，两类之一为空时方差视为0
+        self.assertEqual(_otsu_threshold(make({30: 500, 220: 1500})), 30)
+        self.assertEqual(_otsu_threshold(make({128: 1000})), 0)
+                
+    def test_split_ocr_batches(self):
+        """测试OCR任务均分到各进程，进程池大小不超过可用进程数"""
+        for page_count in (1, 3, 10, 12, 40, 100, 1000):
+            for processes in (1, 2, 8):
+                with self.subTest(page_count=page_count, processes=processes):
+                    page_nums = list(range(page_count))
+                    batches, pool_size = _split_ocr_batches(page_nums, processes)
+                    self.assertEqual([p for batch in batches for p in batch], page_nums)
+                    self.assertLessEqual(pool_size, processes)
+                    self.assertEqual(pool_size, min(processes, page_count))
+                    self.assertLessEqual(max(len(batch) for batch in batches), _OCR_BATCH_SIZE)
+                    self.assertLessEqual(max(map(len, batches)) - min(map(len, batches)), 1)
+                    
+        # 页数较少时每个核心都有任务
+        batches, pool_size = _split_ocr_batches(list(range(10)), 8)
+        self.assertEqual(pool_size, 8)
+        self.assertEqual(len(batches), 8)
+        
+        self.assertEqual(_split_ocr_batches([], 8), ([], 0))
+        
+    def test_ocr_single_process_runs_in_process(self):
+        """测试进程数为1时即使页数超过一个任务，也在当前进程中识别而不创建进程池"""
+        import fitz
+        from docx import Document
+        
+        page_count = _OCR_BATCH_SIZE + 4
+        pdf_path = str(self.output_dir / "ocr_single_process.pdf")
+        output_path = str(self.output_dir / "ocr_single_process.docx")
+        for path in (pdf_path, output_path):
+            self.addCleanup(Path(path).unlink, missing_ok=True)
+        with fitz.open() as pdf_doc:
+            for _ in range(page_count):
+                pdf_doc.new_page()
+            pdf_doc.save(pdf_path)
+            
+        def fake_ocr_pages(args):
+            _, page_nums, _ = args
+            return [(page_num, f"第{page_num + 1}页") for page_num in page_nums]
+            
+        with mock.patch("src.converter._check_tesseract"), \
+             mock.patch("src.converter._init_ocr_worker"), \
+             mock.patch("src.converter._ocr_pages", side_effect=fake_ocr_pages) as ocr_pages, \
+             mock.patch("src.converter.Pool") as pool:
+            self.converter.convert_pdf_to_word(pdf_path, output_path, use_ocr=True, processes=1)
+            
+        pool.assert_not_called()
+        self.assertGreater(ocr_pages.call_count, 1)
+        texts = [p.text for p in Document(output_path).paragraphs if p.text]
+        self.assertEqual(texts, [f"第{i + 1}页" for i in range(page_count)])
+        
+    def test_append_text_paragraph(self):
+        """测试直接追加段落与python-docx的add_paragraph生成相同的XML"""
+        from docx import Document
+        
+        texts = ["第一行\n第二行  ", " a\tb", "", "x\r\ny\n\n"]
+        expected = Document()
+        actual = Document()
+        for text in texts:
+            expected.add_paragraph(text)
+            _append_text_paragraph(actual.element.body, text)
+            
+        self.assertEqual(expected.element.body.xml, actual.element.body.xml)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+测试GUI界面中的辅助功能
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.gui import MainWindow, _output_files
+
+
+def parse_page_range(page_range_str):
+    """parse_page_range不访问窗口状态，以self=None直接调用，无需创建QApplication和窗口"""
+    return MainWindow.parse_page_range(None, page_range_str)
+
+
+class TestParsePageRange(unittest.TestCase):
+    """页码范围解析测试类"""
+    
+    def test_basic(self):
+        """测试单页、连续页面和混合格式"""
+        self.assertEqual(parse_page_range("5"), [5])
+        self.assertEqual(parse_page_range("1-5"), [1, 2, 3, 4, 5])
+        self.assertEqual(parse_page_range("1-5,8,10-12"), [1, 2, 3, 4, 5, 8, 10, 11, 12])
+        self.assertEqual(parse_page_range(" 1 - 3 , 7 "), [1, 2, 3, 7])
+        
+    def test_empty(self):
+        """测试空字符串和只有空白的字符串"""
+        self.assertEqual(parse_page_range(""), [])
+        self.assertEqual(parse_page_range("   "), [])
+        
+    def test_reversed_range(self):
+        """测试起始页大于结束页的范围被忽略"""
+        self.assertEqual(parse_page_range("5-3"), [])
+        self.assertEqual(parse_page_range("5-3,2"), [2])
+        
+    def test_overlapping_ranges(self):
+        """测试重叠、包含和乱序的范围合并后有序且不重复"""
+        self.assertEqual(parse_page_range("1-5,3-9"), list(range(1, 10)))
+        self.assertEqual(parse_page_range("3-9,1-5"), list(range(1, 10)))
+        self.assertEqual(parse_page_range("1-10,2-4"), list(range(1, 11)))
+        self.assertEqual(parse_page_range("2-4,1-10"), list(range(1, 11)))
+        self.assertEqual(parse_page_range("4-6,5,1-2"), [1, 2, 4, 5, 6])
+        
+    def test_duplicate_pages(self):
+        """测试重复的页码只保留一次"""
+        self.assertEqual(parse_page_range("2,2,1-3"), [1, 2, 3])
+        self.assertEqual(parse_page_range("3,3,3"), [3])
+        self.assertEqual(parse_page_range("1-3,1-3"), [1, 2, 3])
+        
+    def test_invalid_format(self):
+        """测试任意一项格式无效时返回空列表，由界面提示格式错误"""
+        for page_range_str in ("1.5", "-3", "1 5", "第3页", "1-", "1-5,8a", "1-2-3", "1-5,x"):
+            with self.subTest(page_range_str=page_range_str):
+                self.assertEqual(parse_page_range(page_range_str), [])
+                
+    def test_extra_commas(self):
+        """测试多余的逗号被忽略"""
+        self.assertEqual(parse_page_range("1-3,,5,"), [1, 2, 3, 5])
+        self.assertEqual(parse_page_range(" , ,"), [])
+
+
+class TestOutputFiles(unittest.TestCase):
+    """输出文件路径测试类"""
+    
+    def test_unique_names(self):
+        """测试不同文件名直接使用原文件名"""
+        files = [os.path.join("a", "报告.pdf"), os.path.join("b", "附录.PDF")]
+        self.assertEqual(_output_files(files, "out"),
+                         [os.path.join("out", "报告.docx"), os.path.join("out", "附录.docx")])
+        
+    def test_duplicate_names(self):
+        """测试不同目录下的同名文件输出到不同的文档"""
+        files = [os.path.join("a", "报告.pdf"), os.path.join("b", "报告.pdf"),
+                 os.path.join("c", "报告_2.pdf"), os.path.join("d", "报告.pdf")]
+        self.assertEqual(_output_files(files, "out"), [
+            os.path.join("out", "报告.docx"),
+            os.path.join("out", "报告_2.docx"),
+            os.path.join("out", "报告_2_2.docx"),
+            os.path.join("out", "报告_3.docx"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()